@@ -0,0 +1,145 @@
+"""
+Shared cache of chat answers, stored under uploaded_docs/.answers.
+
+Answers are keyed by the normalized question and a version stamp of the documents
+the question was routed to, so a re-upload or regenerated summary changes the key
+and old answers are simply never looked up again. Records are plain JSON files, written
+atomically, so every session and process serving the app shares them. Answers older
+than ANSWER_TTL_SECONDS are ignored and, together with anything beyond the newest
+MAX_ANSWERS, deleted by prune(), which save_answer runs every PRUNE_EVERY writes.
+"""
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import text_store
+
+ANSWER_DIR = os.path.join("uploaded_docs", ".answers")
+# Questions with fewer content words (stopwords removed) than this, such as "why?" or
+# "tell me more", are too vague to share and are never served from or written to the cache
+MIN_CACHEABLE_WORDS = 2
+
+ANSWER_TTL_SECONDS = 30 * 24 * 3600
+MAX_ANSWERS = 2000
+PRUNE_EVERY = 50
+
+_saves_since_prune = 0
+_prune_lock = threading.Lock()
+
+
+def normalize_question(question):
+    """Lowercase, strip punctuation and collapse whitespace"""
+    return " ".join(re.findall(r"[a-z0-9]+", question.lower()))
+
+def is_cacheable(question, chat_history, tokenize):
+    """
+    Whether a question may use the shared cache.
+
+    A question asked after earlier turns may lean on that user's own history, and one
+    with fewer than MIN_CACHEABLE_WORDS content words is too vague to share.
+
+    Args:
+        question (str): Question as asked
+        chat_history (list): Earlier messages of the conversation
+        tokenize (callable): Returns the question's content words, stopwords removed
+    """
+    return not chat_history and len(tokenize(question)) >= MIN_CACHEABLE_WORDS
+
+def corpus_version(documents):
+    """
+    Version stamp of a set of documents.
+
+    Changes whenever a document is added, removed, re-uploaded with different
+    content or gets a new summary.
+    """
+    digest = hashlib.sha256()
+    for filename in sorted(documents):
+        doc_data = documents[filename]
+        text = doc_data['text']
+        # Stored text is content-addressed, so its path identifies the content
+        content = text.path if isinstance(text, text_store.TextHandle) else hashlib.sha256(text.encode('utf-8')).hexdigest()
+        digest.update(f"{filename}\0{content}\0{doc_data['summary']}\0".encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+def answer_path(question, version):
+    key = hashlib.sha256(f"{version}\0{normalize_question(question)}".encode('utf-8')).hexdigest()[:32]
+    return os.path.join(ANSWER_DIR, f"{key}.json")
+
+def load_answer(question, version):
+    """Cached answer record for this question and corpus version, or None if absent or expired"""
+    path = answer_path(question, version)
+    try:
+        if time.time() - os.path.getmtime(path) > ANSWER_TTL_SECONDS:
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+def prune(max_entries=MAX_ANSWERS, ttl_seconds=ANSWER_TTL_SECONDS):
+    """
+    Delete expired answers, then the oldest ones beyond max_entries.
+
+    Returns:
+        int: Number of answers deleted
+    """
+    if not os.path.isdir(ANSWER_DIR):
+        return 0
+    entries = []
+    for name in os.listdir(ANSWER_DIR):
+        path = os.path.join(ANSWER_DIR, name)
+        try:
+            entries.append((os.path.getmtime(path), path))
+        except FileNotFoundError:
+            continue  # Removed by another session meanwhile
+    entries.sort(reverse=True)
+
+    now = time.time()
+    deleted = 0
+    for position, (mtime, path) in enumerate(entries):
+        if position >= max_entries or now - mtime > ttl_seconds:
+            try:
+                os.remove(path)
+                deleted += 1
+            except FileNotFoundError:
+                pass
+    return deleted
+
+def save_answer(question, version, answer, citations, tokens):
+    """
+    Store an answer for later sessions asking the same question.
+
+    Args:
+        question (str): Question as asked
+        version (str): corpus_version() of the documents it was answered from
+        answer (str): Answer text
+        citations (list): Citation dicts from resolve_citations
+        tokens (dict): Token usage of the generation
+    """
+    os.makedirs(ANSWER_DIR, exist_ok=True)
+    record = {
+        "question": normalize_question(question),
+        "corpus_version": version,
+        "answer": answer,
+        "citations": citations,
+        "tokens": tokens,
+        "created_at": datetime.now().isoformat(),
+    }
+    fd, tmp_path = tempfile.mkstemp(dir=ANSWER_DIR, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(record, f)
+    os.replace(tmp_path, answer_path(question, version))
+
+    global _saves_since_prune
+    with _prune_lock:
+        _saves_since_prune += 1
+        due = _saves_since_prune >= PRUNE_EVERY
+        if due:
+            _saves_since_prune = 0
+    if due:
+        prune()
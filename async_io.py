@@ -0,0 +1,54 @@
+"""
+Dedicated asyncio event loop for external I/O (S3, Supabase, Gemini).
+
+Streamlit runs each script on its own thread with no event loop, so async
+work is handed to one long-lived loop running on a daemon thread, where
+independent calls from any session can overlap.
+
+    result = run(some_coroutine())   # block the script thread until done
+    future = submit(some_coroutine())  # fire and forget, returns a Future
+"""
+import asyncio
+import threading
+
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def get_loop():
+    """Return the shared I/O event loop, starting its thread on first use"""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=_loop.run_forever, name="kt-io-loop", daemon=True)
+            thread.start()
+    return _loop
+
+def submit(coro):
+    """
+    Schedule a coroutine on the I/O loop without waiting for it.
+
+    Returns:
+        concurrent.futures.Future: Resolves to the coroutine's result
+    """
+    return asyncio.run_coroutine_threadsafe(coro, get_loop())
+
+def run(coro, timeout=None):
+    """Run a coroutine on the I/O loop and block until it finishes"""
+    return submit(coro).result(timeout)
+
+async def gather_limited(coros, limit):
+    """
+    Await coroutines concurrently with at most `limit` in flight.
+
+    Returns:
+        list: Results in the same order as `coros`; exceptions are returned, not raised
+    """
+    semaphore = asyncio.Semaphore(limit)
+
+    async def limited(coro):
+        async with semaphore:
+            return await coro
+
+    return await asyncio.gather(*(limited(c) for c in coros), return_exceptions=True)
@@ -90,4 +90,42 @@ try:
 except Exception as e:
     print(f" Error fetching file uploads: {e}\n")
 
+# Fetch chat queries
+print("=" * 60)
+print("💬 CHAT QUERIES")
+print("=" * 60)
+try:
+    queries = supabase.table("chat_queries").select("*").order("query_time", desc=True).execute()
+    
+    if queries.data:
+        hits = sum(1 for q in queries.data if q.get('cache_hit'))
+        latencies = [q['latency_ms'] for q in queries.data if q.get('latency_ms') is not None]
+        tokens = sum((q.get('prompt_tokens') or 0) + (q.get('response_tokens') or 0) for q in queries.data)
+        
+        print(f"\nTotal questions: {len(queries.data)}")
+        print(f"   Cache hit rate: {hits / len(queries.data):.0%}")
+        if latencies:
+            print(f"   Average latency: {sum(latencies) / len(latencies):.0f} ms")
+        print(f"   Tokens used: {tokens}\n")
+        
+        # Most frequently asked questions - candidates for precomputed FAQ answers
+        question_counts = defaultdict(int)
+        document_counts = defaultdict(int)
+        for q in queries.data:
+            question_counts[q.get('normalized_question')] += 1
+            for filename in q.get('documents') or []:
+                document_counts[filename] += 1
+        
+        print("🔁 Most asked questions:")
+        for question, count in sorted(question_counts.items(), key=lambda item: item[1], reverse=True)[:10]:
+            print(f"   {count}x  {question}")
+        print("\n📄 Most used documents:")
+        for filename, count in sorted(document_counts.items(), key=lambda item: item[1], reverse=True)[:10]:
+            print(f"   {count}x  {filename}")
+        print()
+    else:
+        print("No chat queries found.\n")
+except Exception as e:
+    print(f" Error fetching chat queries: {e}\n")
+
 print("=" * 60)
\ No newline at end of file
@@ -0,0 +1,102 @@
+"""
+Text extraction for uploaded documents (PDF, DOCX, TXT).
+
+Readers return (label, text) segments - one per PDF page, DOCX paragraph or TXT
+line - which build_chunk_index joins into the document text plus a chunk offset
+index used for citations. Nothing here depends on Streamlit, so the summary
+warm-up job can extract documents too; readers raise and callers report errors.
+"""
+import os
+from array import array
+
+import pypdf  # pyright: ignore[reportMissingImports]
+import docx  # pyright: ignore[reportMissingImports]
+
+SUPPORTED_EXTENSIONS = (".pdf", ".docx", ".txt")
+# Chunks shorter than this are merged with the following segment (DOCX / TXT only)
+MIN_CHUNK_CHARS = 500
+
+
+def read_pdf(file_path):
+    """Return a list of (label, text) segments, one per page"""
+    reader = pypdf.PdfReader(file_path)
+    return [(f"page {page_number}", page.extract_text() + "\n")
+            for page_number, page in enumerate(reader.pages, 1)]
+
+def read_docx(file_path):
+    """Return a list of (label, text) segments, one per paragraph, labelled by heading"""
+    segments = []
+    doc = docx.Document(file_path)
+    heading = None
+    for para_number, para in enumerate(doc.paragraphs, 1):
+        if para.style is not None and para.style.name.startswith("Heading") and para.text.strip():
+            heading = para.text.strip()
+        label = f"section '{heading}'" if heading else f"paragraph {para_number}"
+        segments.append((label, para.text + "\n"))
+    return segments
+
+def read_txt(file_path):
+    """Return a list of (label, text) segments, one per line"""
+    with open(file_path, "r", encoding="utf-8") as f:
+        return [(f"line {line_number}", line) for line_number, line in enumerate(f, 1)]
+
+def chunk_label(first, last):
+    """Label for a chunk spanning two segment labels, e.g. "lines 1-26" """
+    if first == last:
+        return first
+    first_kind, _, first_number = first.partition(" ")
+    last_kind, _, last_number = last.partition(" ")
+    if first_kind == last_kind and first_number.isdigit() and last_number.isdigit():
+        return f"{first_kind}s {first_number}-{last_number}"
+    return f"{first} to {last}"
+
+def build_chunk_index(segments, min_chars=MIN_CHUNK_CHARS):
+    """
+    Join extracted segments into the document text and record where each chunk lives.
+
+    Consecutive segments sharing a label, or following a chunk shorter than
+    min_chars, are merged into one chunk labelled with the range it covers.
+
+    Args:
+        segments (list): (label, text) pairs from one of the read_* functions
+        min_chars (int): Minimum chunk size before a new chunk is started
+
+    Returns:
+        tuple: (text, chunk index) where the index holds parallel 'starts' / 'ends'
+        character offset arrays and a 'labels' list
+    """
+    index = {'starts': array('I'), 'ends': array('I'), 'labels': []}
+    parts = []
+    offset = 0
+    first_label = last_label = None
+    for label, segment in segments:
+        if index['labels'] and (label == last_label or
+                                index['ends'][-1] - index['starts'][-1] < min_chars):
+            index['ends'][-1] += len(segment)
+            index['labels'][-1] = chunk_label(first_label, label)
+        else:
+            index['starts'].append(offset)
+            index['ends'].append(offset + len(segment))
+            index['labels'].append(label)
+            first_label = label
+        last_label = label
+        parts.append(segment)
+        offset += len(segment)
+    return "".join(parts), index
+
+def extract_text(file_path):
+    """
+    Extract a document's text and chunk index; unsupported types yield empty text.
+
+    Returns:
+        tuple: (text, chunk index) as returned by build_chunk_index
+    """
+    ext = os.path.splitext(file_path)[1].lower()
+    if ext == ".pdf":
+        # Keep pages as exact chunks so citations point at a single page
+        return build_chunk_index(read_pdf(file_path), min_chars=0)
+    if ext == ".docx":
+        return build_chunk_index(read_docx(file_path))
+    if ext == ".txt":
+        return build_chunk_index(read_txt(file_path))
+    return build_chunk_index([])
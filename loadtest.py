@@ -0,0 +1,289 @@
+"""
+Load test: N simulated KT users logging in, uploading documents and chatting.
+
+Drives main.py's service functions (the same ones the Streamlit pages call) from one
+thread per simulated user, mirroring how Streamlit runs one script thread per session.
+External services are replaced with local stand-ins:
+
+    S3        moto's in-process mock (pip install moto), or --s3 env to use the
+              AWS_* / S3_BUCKET_NAME / AWS_ENDPOINT_URL settings (e.g. a local MinIO)
+    Supabase  an in-process fake with --db-latency, or --supabase env to use
+              SUPABASE_URL / SUPABASE_KEY (e.g. a local PostgREST)
+    Gemini    a fake model that sleeps for --llm-latency seconds
+
+Example:
+
+    python loadtest.py --users 50 --files 3 --turns 5 --llm-latency 1.5
+
+The run happens in a temporary working directory so uploaded_docs/ is untouched.
+"""
+import argparse
+import asyncio
+import os
+import random
+import re
+import resource
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+WORDS = (
+    "deployment pipeline owner runbook service database backup incident escalation release "
+    "kubernetes monitoring alert dashboard access onboarding vendor contract budget roadmap "
+    "migration schema api gateway cache queue retry timeout credential rotation audit"
+).split()
+QUESTIONS = [
+    "Who owns the deployment pipeline?",
+    "How do we escalate an incident?",
+    "Where is the runbook for database backup?",
+    "What is the release process?",
+    "Which vendor contract covers monitoring?",
+]
+
+
+# --- Stand-ins ---
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeGenerativeModel:
+    """Replaces genai.GenerativeModel; answers after a fixed latency"""
+    latency = 1.0
+
+    def __init__(self, model_name, **kwargs):
+        self.model_name = model_name
+
+    def _answer(self, prompt):
+        if "User Question:" in prompt:
+            # Cite the first chunk of each routed document so citation resolution is exercised
+            markers = "".join(f"[{name}#C0]" for name in re.findall(r"--- Document: (.+?) ---", prompt))
+            return f"The pipeline is owned by the platform team. {markers}"
+        return "1. Purpose: load-test document.\n2. Owner: platform team."
+
+    def generate_content(self, prompt):
+        time.sleep(self.latency)
+        return FakeResponse(self._answer(prompt))
+
+    async def generate_content_async(self, prompt):
+        await asyncio.sleep(self.latency)
+        return FakeResponse(self._answer(prompt))
+
+
+class FakeQuery:
+    """Chainable stand-in for a postgrest query builder; execute() sleeps then records"""
+
+    def __init__(self, db, table):
+        self.db = db
+        self.table = table
+
+    def __getattr__(self, name):
+        # select / insert / update / upsert / eq ... all just chain
+        return lambda *args, **kwargs: self
+
+    def execute(self):
+        time.sleep(self.db.latency)
+        with self.db.lock:
+            self.db.calls[self.table] += 1
+        return FakeResponse("")
+
+
+class FakeSupabase:
+    def __init__(self, latency):
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.calls = defaultdict(int)
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+
+class FakeUpload:
+    """Quacks like Streamlit's UploadedFile for process_file"""
+
+    def __init__(self, name, data):
+        self.name = name
+        self.data = data
+
+    def getbuffer(self):
+        return memoryview(self.data)
+
+
+def make_document(chars):
+    words = []
+    size = 0
+    while size < chars:
+        word = random.choice(WORDS)
+        words.append(word)
+        size += len(word) + 1
+    return " ".join(words).encode('utf-8')
+
+
+# --- Measurement ---
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def timed(self, op, fn, *args):
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        except Exception as e:
+            with self.lock:
+                self.errors[op] += 1
+            print(f"❌ {op}: {e}", file=sys.stderr)
+            return None
+        finally:
+            with self.lock:
+                self.latencies[op].append(time.perf_counter() - start)
+
+
+def percentile(values, pct):
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method='inclusive')[pct - 1]
+
+def report(recorder, elapsed, users, rss_delta_kb, extra):
+    print(f"\n{users} users in {elapsed:.1f}s")
+    print(f"{'operation':<10}{'count':>7}{'errors':>8}{'ops/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for op, values in recorder.latencies.items():
+        print(f"{op:<10}{len(values):>7}{recorder.errors[op]:>8}{len(values) / elapsed:>9.2f}"
+              f"{percentile(values, 50) * 1000:>10.0f}{percentile(values, 95) * 1000:>10.0f}"
+              f"{percentile(values, 99) * 1000:>10.0f}{max(values) * 1000:>10.0f}")
+    print(f"\nPeak RSS growth: {rss_delta_kb / 1024:.1f} MiB ({rss_delta_kb / users:.0f} KiB per user)")
+    for line in extra:
+        print(line)
+
+
+async def drain_background_io():
+    """Wait for fire-and-forget writes (login audit, chat query log) still on the I/O loop"""
+    current = asyncio.current_task()
+    while pending := [task for task in asyncio.all_tasks() if task is not current]:
+        await asyncio.gather(*pending, return_exceptions=True)
+
+
+# --- Simulated user ---
+def simulate_user(main, recorder, user_id, args, api_key):
+    email = f"user{user_id}@loadtest.local"
+    password = f"pw{user_id}"
+
+    # login_page
+    def login():
+        users = main.get_users_from_s3()
+        if email not in users:
+            users[email] = password
+            main.save_users_to_s3(users)
+        main.store_user_login(email)
+    recorder.timed("login", login)
+
+    # Upload & Process tab: extract every file, then summarize them concurrently
+    documents = {}
+    def upload():
+        pending = []
+        for n in range(args.files):
+            name = f"user{user_id}_doc{n}.txt"
+            file_path, text, chunks = main.process_file(FakeUpload(name, make_document(args.doc_chars)))
+            summary = main.cached_summary(name, text)
+            if summary is None:
+                pending.append((name, text))
+            documents[name] = {"text": text, "summary": summary, "uploaded_by": email,
+                               "file_path": file_path, "chunks": chunks}
+            main.store_file_upload(email, name, file_path)
+        if pending:
+            summaries = main.async_io.run(main.generate_summaries_async([t for _, t in pending], api_key))
+            for (name, text), summary in zip(pending, summaries):
+                summary = str(summary)
+                if summary.startswith(main.SUMMARY_ERROR_PREFIX):
+                    documents[name]["summary"] = main.queue_summary(name, text, error=summary) or main.FAILED_SUMMARY
+                else:
+                    main.save_summary(name, text, summary)
+                    documents[name]["summary"] = summary
+    recorder.timed("upload", upload)
+
+    # Chatbot tab
+    history = []
+    for _ in range(args.turns):
+        question = random.choice(QUESTIONS)
+        def chat():
+            routed = main.route_documents(question, documents)
+            routed_docs = {name: documents[name] for name, _ in routed}
+            return main.answer_question(question, routed_docs, history, api_key, email)
+        result = recorder.timed("chat", chat)
+        history.append({"role": "user", "content": question})
+        history.append({"role": "assistant", "content": result[0] if result else ""})
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Simulate concurrent KT App users")
+    parser.add_argument("--users", type=int, default=10, help="Concurrent simulated users")
+    parser.add_argument("--files", type=int, default=3, help="Documents uploaded per user")
+    parser.add_argument("--doc-chars", type=int, default=50000, help="Size of each generated document")
+    parser.add_argument("--turns", type=int, default=5, help="Chat turns per user")
+    parser.add_argument("--ramp", type=float, default=0.0, help="Seconds over which users start")
+    parser.add_argument("--llm-latency", type=float, default=1.0, help="Fake Gemini latency in seconds")
+    parser.add_argument("--db-latency", type=float, default=0.05, help="Fake Supabase latency in seconds")
+    parser.add_argument("--s3", choices=["moto", "env"], default="moto")
+    parser.add_argument("--supabase", choices=["fake", "env"], default="fake")
+    args = parser.parse_args()
+
+    if args.s3 == "moto":
+        from moto import mock_aws  # pyright: ignore[reportMissingImports]
+        os.environ.update({
+            "AWS_ACCESS_KEY_ID": "testing", "AWS_SECRET_ACCESS_KEY": "testing",
+            "AWS_REGION": "us-east-1", "S3_BUCKET_NAME": "kt-loadtest",
+        })
+        mock_aws().start()
+        import boto3
+        boto3.client("s3", region_name="us-east-1").create_bucket(Bucket="kt-loadtest")
+
+    # Run main.py's module-level setup in a scratch directory with the fake model in place
+    os.chdir(tempfile.mkdtemp(prefix="kt-loadtest-"))
+    sys.path.insert(0, REPO_DIR)
+    import google.generativeai as genai  # pyright: ignore[reportMissingImports]
+    FakeGenerativeModel.latency = args.llm_latency
+    genai.configure = lambda **kwargs: None
+    genai.GenerativeModel = FakeGenerativeModel
+    import main
+
+    fake_db = None
+    if args.supabase == "fake":
+        fake_db = FakeSupabase(args.db_latency)
+        main.get_supabase_client = lambda: fake_db
+
+    recorder = Recorder()
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    threads = [
+        threading.Thread(target=simulate_user, args=(main, recorder, i, args, "loadtest-key"))
+        for i in range(args.users)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+        if args.ramp:
+            time.sleep(args.ramp / args.users)
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    # Background writes are not part of any user-visible latency, but must land before counting them
+    main.async_io.run(drain_background_io())
+    rss_delta = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before
+
+    extra = []
+    if main.s3_client:
+        stored = len(main.get_users_from_s3())
+        extra.append(f"Users persisted in S3: {stored}/{args.users}"
+                     + ("" if stored == args.users else " (concurrent credential writes were lost)"))
+    if fake_db:
+        extra.append(f"Supabase calls: {dict(fake_db.calls)}")
+    report(recorder, elapsed, args.users, rss_delta, extra)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -4,16 +4,28 @@ warnings.filterwarnings('ignore', category=FutureWarning)
 import google.generativeai as genai  # pyright: ignore[reportMissingImports]
 import os
 import json
+import asyncio
+import logging
+import math
+import re
+import time
 import tempfile
 from pathlib import Path
-import pypdf  # pyright: ignore[reportMissingImports]
-import docx  # pyright: ignore[reportMissingImports]
 from dotenv import load_dotenv
 from supabase import create_client
 from datetime import datetime
 import boto3
+import async_io
+import answer_cache
+import document_reader
+import text_store
+from summary_store import (
+    SUMMARY_ERROR_PREFIX, cached_summary, generate_summary_async, load_record, queue_summary, refresh_reason,
+    save_summary, text_hash, usable_summary
+)
 # Load environment variables
 load_dotenv()
+logger = logging.getLogger(__name__)
 
 # Initialize S3 client only if AWS credentials are provided
 s3_client = None
@@ -53,6 +65,97 @@ UPLOAD_DIR = "uploaded_docs"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
 
+# --- Async I/O ---
+# The *_async functions do the network I/O on the shared loop in async_io and raise on
+# failure; the sync functions below are the facade the Streamlit script calls.
+SUMMARY_CONCURRENCY = 4
+
+
+async def get_users_from_s3_async() -> dict:
+    """Async variant of get_users_from_s3; raises on S3 errors other than a missing file"""
+    if not s3_client or not S3_BUCKET:
+        return {}  # S3 not configured, return empty dict
+
+    try:
+        response = await asyncio.to_thread(s3_client.get_object, Bucket=S3_BUCKET, Key=S3_USERS_KEY)
+    except s3_client.exceptions.NoSuchKey:
+        # If file doesn't exist, return empty dict
+        return {}
+    body = await asyncio.to_thread(response['Body'].read)
+    return json.loads(body.decode('utf-8'))
+
+async def save_users_to_s3_async(users_data: dict) -> bool:
+    """Async variant of save_users_to_s3; raises on S3 errors"""
+    if not s3_client or not S3_BUCKET:
+        return False  # S3 not configured
+
+    await asyncio.to_thread(
+        s3_client.put_object,
+        Bucket=S3_BUCKET,
+        Key=S3_USERS_KEY,
+        Body=json.dumps(users_data)
+    )
+    return True
+
+async def store_user_login_async(email):
+    """Upsert the user's latest login time in a single round trip (email is UNIQUE)"""
+    supabase = get_supabase_client()
+    if supabase:
+        await asyncio.to_thread(
+            supabase.table("user_logins").upsert({
+                "email": email,
+                "login_time": datetime.now().isoformat()
+            }, on_conflict="email").execute
+        )
+
+async def store_file_upload_async(email, filename, file_path):
+    """Async variant of store_file_upload; raises on Supabase errors"""
+    supabase = get_supabase_client()
+    if supabase:
+        await asyncio.to_thread(
+            supabase.table("file_uploads").insert({
+                "email": email,
+                "filename": filename,
+                "file_path": file_path,
+                "upload_time": datetime.now().isoformat()
+            }).execute
+        )
+
+async def store_chat_query_async(email, question, documents, latency_ms, cache_hit, tokens):
+    """Record one chat question in the chat_queries table"""
+    supabase = get_supabase_client()
+    if supabase:
+        await asyncio.to_thread(
+            supabase.table("chat_queries").insert({
+                "email": email,
+                "question": question,
+                "normalized_question": answer_cache.normalize_question(question),
+                "documents": documents,
+                "latency_ms": latency_ms,
+                "cache_hit": cache_hit,
+                "prompt_tokens": tokens.get("prompt_tokens"),
+                "response_tokens": tokens.get("response_tokens"),
+                "query_time": datetime.now().isoformat()
+            }).execute
+        )
+
+async def generate_summaries_async(texts, api_key, limit=SUMMARY_CONCURRENCY):
+    """Summarize several documents with up to `limit` Gemini calls in flight"""
+    return await async_io.gather_limited(
+        [generate_summary_async(text, api_key) for text in texts], limit
+    )
+
+def log_background_error(label):
+    """
+    Done-callback for fire-and-forget I/O. The page has usually rerun by the time
+    these finish, so failures go to the server log rather than st.error.
+    """
+    def callback(future):
+        if future.exception():
+            logger.warning("%s failed: %s", label, future.exception())
+    return callback
+
+
 def get_users_from_s3() -> dict:
     """
     Load user credentials from S3.
@@ -60,16 +163,8 @@ def get_users_from_s3() -> dict:
     Returns:
         dict: Dictionary containing username-password pairs
     """
-    if not s3_client or not S3_BUCKET:
-        return {}  # S3 not configured, return empty dict
-    
     try:
-        response = s3_client.get_object(Bucket=S3_BUCKET, Key=S3_USERS_KEY)
-        users_data = json.loads(response['Body'].read().decode('utf-8'))
-        return users_data
-    except s3_client.exceptions.NoSuchKey:
-        # If file doesn't exist, return empty dict
-        return {}
+        return async_io.run(get_users_from_s3_async())
     except Exception as e:
         st.error(f"Error accessing S3: {str(e)}")
         return {}
@@ -84,17 +179,8 @@ def save_users_to_s3(users_data: dict) -> bool:
     Returns:
         bool: True if successful, False otherwise
     """
-    if not s3_client or not S3_BUCKET:
-        return False  # S3 not configured
-    
     try:
-        users_json = json.dumps(users_data)
-        s3_client.put_object(
-            Bucket=S3_BUCKET,
-            Key=S3_USERS_KEY,
-            Body=users_json
-        )
-        return True
+        return async_io.run(save_users_to_s3_async(users_data))
     except Exception as e:
         st.error(f"Error saving to S3: {str(e)}")
         return False
@@ -110,82 +196,38 @@ def get_supabase_client():
     return None
 
 def store_user_login(email):
-    """Store user login in Supabase - updates if user exists, inserts if new"""
-    supabase = get_supabase_client()
-    if supabase:
-        try:
-            current_time = datetime.now().isoformat()
-            
-            # Check if user already exists
-            existing = supabase.table("user_logins").select("id, email").eq("email", email).execute()
-            
-            if existing.data:
-                # User exists - update the login_time
-                user_id = existing.data[0]['id']
-                supabase.table("user_logins").update({
-                    "login_time": current_time
-                }).eq("id", user_id).execute()
-            else:
-                # New user - insert
-                supabase.table("user_logins").insert({
-                    "email": email,
-                    "login_time": current_time
-                }).execute()
-        except Exception as e:
-            st.error(f"Error storing login: {e}")
+    """
+    Store user login in Supabase - updates if user exists, inserts if new.
+    Runs in the background so the page can rerun without waiting for the audit write;
+    failures are logged on the server and are not shown in the UI.
+    """
+    future = async_io.submit(store_user_login_async(email))
+    future.add_done_callback(log_background_error("Storing login"))
+    return future
+
+def store_chat_query(email, question, documents, latency_ms, cache_hit, tokens):
+    """Record chat usage in Supabase in the background"""
+    future = async_io.submit(store_chat_query_async(email, question, documents, latency_ms, cache_hit, tokens))
+    future.add_done_callback(log_background_error("Storing chat query"))
+    return future
 
 def store_file_upload(email, filename, file_path):
     """Store file upload information in Supabase"""
-    supabase = get_supabase_client()
-    if supabase:
-        try:
-            supabase.table("file_uploads").insert({
-                "email": email,
-                "filename": filename,
-                "file_path": file_path,
-                "upload_time": datetime.now().isoformat()
-            }).execute()
-        except Exception as e:
-            st.error(f"Error storing file upload: {e}")
+    try:
+        async_io.run(store_file_upload_async(email, filename, file_path))
+    except Exception as e:
+        st.error(f"Error storing file upload: {e}")
 
 # --- Session State Initialization ---
 if 'authenticated' not in st.session_state:
     st.session_state.authenticated = False
 if 'documents' not in st.session_state:
-    st.session_state.documents = {}  # {filename: {'text': ..., 'summary': ..., 'metadata': ...}}
+    st.session_state.documents = {}  # {filename: {'text': TextHandle, 'summary': ..., 'metadata': ...}}
 if 'chat_history' not in st.session_state:
     st.session_state.chat_history = []
 
 # --- Helper Functions ---
 
-def read_pdf(file_path):
-    text = ""
-    try:
-        reader = pypdf.PdfReader(file_path)
-        for page in reader.pages:
-            text += page.extract_text() + "\n"
-    except Exception as e:
-        st.error(f"Error reading PDF: {e}")
-    return text
-
-def read_docx(file_path):
-    text = ""
-    try:
-        doc = docx.Document(file_path)
-        for para in doc.paragraphs:
-            text += para.text + "\n"
-    except Exception as e:
-        st.error(f"Error reading DOCX: {e}")
-    return text
-
-def read_txt(file_path):
-    try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            return f.read()
-    except Exception as e:
-        st.error(f"Error reading TXT: {e}")
-        return ""
-
 def process_file(uploaded_file):
     # Save to disk
     file_path = os.path.join(UPLOAD_DIR, uploaded_file.name)
@@ -193,72 +235,339 @@ def process_file(uploaded_file):
         f.write(uploaded_file.getbuffer())
     
     # Extract Text
-    ext = os.path.splitext(uploaded_file.name)[1].lower()
-    text = ""
-    if ext == ".pdf":
-        text = read_pdf(file_path)
-    elif ext == ".docx":
-        text = read_docx(file_path)
-    elif ext == ".txt":
-        text = read_txt(file_path)
-    
-    return file_path, text
-
-def generate_summary(text, api_key):
-    if not text:
-        return "No text to summarize."
-    
     try:
-        genai.configure(api_key=api_key)
-        # Using a model that is confirmed to be available and support generateContent
-        model = genai.GenerativeModel('gemini-2.5-flash')
-        prompt = f"""
-        Please provide a concise summary of the following project document in 5-10 lines maximum. 
-        Focus on:
-        1. Purpose of the document
-        2. Key processes
-        3. Important contacts / ownership
-        4. Key decisions
-
-        Keep the summary brief and to the point. Each point should be 1-2 lines.
-
-        Document Content:
-        {text[:10000]}
-        """
-        response = model.generate_content(prompt)
-        return response.text
+        text, chunks = document_reader.extract_text(file_path)
     except Exception as e:
-        return f"Error generating summary: {e}"
+        ext = os.path.splitext(uploaded_file.name)[1].lower()
+        st.error(f"Error reading {ext.lstrip('.').upper()}: {e}")
+        text, chunks = document_reader.build_chunk_index([])
+    # Keep only a handle in session state; the text itself lives compressed on disk
+    return file_path, text_store.write_text(text), chunks
+
+# --- Query Routing ---
+ROUTE_TOP_K = 3
+NO_API_KEY_SUMMARY = "Summary not available - API key not configured."
+FAILED_SUMMARY = "Summary not available yet - generation failed and will be retried."
+STOPWORDS = {
+    "a", "about", "again", "also", "an", "and", "are", "as", "at", "be", "by", "can", "could",
+    "do", "does", "else", "explain", "for", "from", "he", "her", "him", "his", "how", "i", "if",
+    "in", "is", "it", "its", "me", "more", "my", "of", "on", "or", "other", "our", "please",
+    "she", "should", "so", "tell", "that", "the", "their", "them", "then", "there", "these",
+    "they", "this", "those", "to", "us", "was", "we", "what", "when", "where", "which", "who",
+    "why", "will", "with", "would", "you",
+}
+
+def tokenize(text):
+    """Lowercase word tokens with stopwords and 1-char tokens dropped"""
+    return {t for t in re.findall(r"[a-z0-9]+", text.lower()) if len(t) > 1 and t not in STOPWORDS}
+
+def summary_text(doc_data):
+    """The document's summary, or "" for placeholder and error text that say nothing about it"""
+    summary = doc_data['summary'] or ""
+    if summary in (NO_API_KEY_SUMMARY, FAILED_SUMMARY) or summary.startswith(SUMMARY_ERROR_PREFIX):
+        return ""
+    return summary
 
-def chat_with_docs(query, docs_context, chat_history, api_key):
-    try:
-        genai.configure(api_key=api_key)
-        model = genai.GenerativeModel('gemini-2.5-flash')
-        
-        # Construct Context from all docs
-        context_str = ""
-        for filename, doc_data in docs_context.items():
-            context_str += f"\n--- Document: {filename} ---\n"
+def refresh_summary(filename, doc_data):
+    """
+    Latest summary for a document, picking up anything the warm-up job regenerated.
+    Once a document's summary is known to be current its record is not read again.
+    """
+    if doc_data.get('summary_current'):
+        return doc_data['summary']
+    if 'text_hash' not in doc_data:
+        doc_data['text_hash'] = text_hash(doc_data['text'])
+    record = load_record(filename)
+    if record and record.get('text_hash') == doc_data['text_hash']:
+        if usable_summary(record):
+            doc_data['summary'] = record['summary']
+        doc_data['summary_current'] = refresh_reason(record) is None
+    return doc_data['summary']
+
+def document_keywords(filename, doc_data):
+    """
+    Keyword set used for routing, built from the filename, summary and document opening.
+    Cached on the document together with the summary it was built from, so it is
+    rebuilt whenever the summary is filled in or regenerated.
+    """
+    summary = summary_text(doc_data)
+    cached = doc_data.get('keywords')
+    if cached is None or cached[0] != summary:
+        doc_data['keywords'] = (summary, tokenize(f"{filename} {summary} {doc_data['text'][:2000]}"))
+    return doc_data['keywords'][1]
+
+def route_documents(query, docs_context, top_k=ROUTE_TOP_K):
+    """
+    Score documents against the query by IDF-weighted keyword overlap.
+
+    Args:
+        query (str): User question
+        docs_context (dict): {filename: doc_data} mapping
+        top_k (int): Maximum number of documents to keep
+
+    Returns:
+        list: (filename, score) pairs for up to top_k matching documents, best first.
+        Documents with no overlap are dropped, unless no document overlaps at all.
+    """
+    query_terms = tokenize(query)
+    keywords = {name: document_keywords(name, data) for name, data in docs_context.items()}
+    n_docs = len(keywords)
+
+    # Document frequency of each query term, computed once per query
+    idf = {}
+    for term in query_terms:
+        df = sum(1 for terms in keywords.values() if term in terms)
+        if df:
+            idf[term] = math.log(1 + n_docs / df)
+
+    scores = {
+        name: sum(idf.get(term, 0.0) for term in query_terms & terms)
+        for name, terms in keywords.items()
+    }
+
+    ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    matching = [item for item in ranked if item[1] > 0]
+    return (matching or ranked)[:top_k]
+
+CONTEXT_CHARS = 20000
+# A bracket ending in a #C<n> marker; it may hold several markers, e.g. [a.pdf#C0, a.pdf#C1].
+# Items are split on the #C<n> boundaries, since filenames may contain commas or semicolons.
+CITATION_PATTERN = re.compile(r"\[\s*([^\[\]]+?#C\d+)\s*\]")
+CITATION_ITEM = re.compile(r"(.+?)#C(\d+)\s*(?:[,;]\s*|$)")
+
+
+def document_context(doc_data, limit=CONTEXT_CHARS):
+    """Document text up to limit chars, with a [C<n>] marker at the start of each chunk"""
+    text = doc_data['text']
+    chunks = doc_data.get('chunks')
+    if not chunks:
+        return text[:limit]
+
+    parts = []
+    for chunk_id, (start, end) in enumerate(zip(chunks['starts'], chunks['ends'])):
+        if start >= limit:
+            break
+        parts.append(f"[C{chunk_id}] {text[start:min(end, limit)]}")
+    return "".join(parts)
+
+def resolve_citations(answer, docs_context):
+    """
+    Replace [filename#C<n>] markers in an answer with numbered references.
+
+    Returns:
+        tuple: (answer with [1], [2], ... markers, list of citation dicts holding
+        filename, label, start and end offsets)
+    """
+    citations = []
+    numbers = {}
+
+    def number(filename, chunk_id):
+        chunks = docs_context.get(filename, {}).get('chunks')
+        if not chunks or chunk_id >= len(chunks['labels']):
+            return ""
+        if (filename, chunk_id) not in numbers:
+            numbers[(filename, chunk_id)] = len(citations) + 1
+            citations.append({
+                "filename": filename,
+                "label": chunks['labels'][chunk_id],
+                "start": chunks['starts'][chunk_id],
+                "end": chunks['ends'][chunk_id],
+            })
+        return f"[{numbers[(filename, chunk_id)]}]"
+
+    def replace(match):
+        return "".join(
+            number(item.group(1).strip(), int(item.group(2)))
+            for item in CITATION_ITEM.finditer(match.group(1))
+        )
+
+    return CITATION_PATTERN.sub(replace, answer), citations
+
+def build_chat_prompt(query, docs_context, chat_history):
+    # Construct Context from all docs
+    context_str = ""
+    for filename, doc_data in docs_context.items():
+        context_str += f"\n--- Document: {filename} ---\n"
+        if summary_text(doc_data):
             context_str += f"Summary: {doc_data['summary']}\n"
-            context_str += f"Content: {doc_data['text'][:20000]}\n" 
+        context_str += f"Content: {document_context(doc_data)}\n" 
+
+    history = [{"role": msg["role"], "content": msg["content"]} for msg in chat_history]
 
-        prompt = f"""
+    return f"""
         You are a Knowledge Transfer (KT) assistant. Answer the user's question using ONLY the provided document context.
         If the information is not available in the uploaded documents, say "This information is not available in the uploaded documents."
+        Document content is split into passages marked [C<n>]. After each statement, cite the passage it came from
+        as [<document name>#C<n>], for example [handover.pdf#C3]. Put each citation in its own brackets,
+        for example [handover.pdf#C3][handover.pdf#C4].
         
         Context:
         {context_str}
 
         Chat History:
-        {chat_history}
+        {history}
 
         User Question: {query}
         """
-        
-        response = model.generate_content(prompt)
-        return response.text
+
+async def chat_with_docs_async(query, docs_context, chat_history, api_key):
+    """Async variant of chat_with_docs"""
+    try:
+        genai.configure(api_key=api_key)
+        model = genai.GenerativeModel('gemini-2.5-flash')
+        prompt = build_chat_prompt(query, docs_context, chat_history)
+        response = await model.generate_content_async(prompt)
+        usage = getattr(response, "usage_metadata", None)
+        tokens = {
+            "prompt_tokens": getattr(usage, "prompt_token_count", None),
+            "response_tokens": getattr(usage, "candidates_token_count", None),
+        }
+        answer, citations = resolve_citations(response.text, docs_context)
+        return answer, citations, tokens
     except Exception as e:
-        return f"Error generating response: {e}"
+        return f"Error generating response: {e}", [], {}
+
+def chat_with_docs(query, docs_context, chat_history, api_key):
+    """
+    Answer a question from the given documents.
+
+    Returns:
+        tuple: (answer text, list of citations as returned by resolve_citations,
+        token usage dict)
+    """
+    return async_io.run(chat_with_docs_async(query, docs_context, chat_history, api_key))
+
+def answer_question(query, docs_context, chat_history, api_key, email):
+    """
+    Answer from the shared answer cache when possible, otherwise generate and cache.
+    Only the first question of a conversation is cacheable. Every question is logged
+    to chat_queries.
+
+    Args:
+        query (str): User question
+        docs_context (dict): Routed {filename: doc_data} documents to answer from
+        chat_history (list): Previous chat messages
+        api_key (str): Gemini API key
+        email (str): Asking user, for usage analytics
+
+    Returns:
+        tuple: (answer text, citations, True if served from the cache)
+    """
+    start = time.perf_counter()
+    cacheable = answer_cache.is_cacheable(query, chat_history, tokenize)
+    version = answer_cache.corpus_version(docs_context)
+
+    cached = answer_cache.load_answer(query, version) if cacheable else None
+    if cached:
+        answer, citations, tokens = cached['answer'], cached['citations'], {}
+    else:
+        answer, citations, tokens = chat_with_docs(query, docs_context, chat_history, api_key)
+        if cacheable and not answer.startswith("Error generating response:"):
+            answer_cache.save_answer(query, version, answer, citations, tokens)
+
+    latency_ms = int((time.perf_counter() - start) * 1000)
+    store_chat_query(email, query, list(docs_context), latency_ms, cached is not None, tokens)
+    return answer, citations, cached is not None
+
+def render_citations(citations):
+    """Show each citation as a source link that expands to the cited passage"""
+    if not citations:
+        return
+    st.caption("Sources")
+    for number, citation in enumerate(citations, 1):
+        doc_data = st.session_state.documents.get(citation['filename'])
+        with st.expander(f"[{number}] {citation['filename']}, {citation['label']}"):
+            if doc_data:
+                st.text(doc_data['text'][citation['start']:citation['end']])
+            else:
+                st.info("This document is no longer available.")
+
+# --- Document Listing ---
+DOCS_PAGE_SIZE = 20
+
+
+def filter_documents(documents, uploaders=None, file_types=None, date_range=None):
+    """
+    Filter documents by uploader, file type and upload date.
+
+    Args:
+        documents (dict): {filename: doc_data} mapping from session state
+        uploaders (list): Uploader emails to keep; empty or None keeps all
+        file_types (list): Extensions (e.g. ".pdf") to keep; empty or None keeps all
+        date_range (tuple): (start, end) dates, inclusive; None keeps all
+
+    Returns:
+        list: (filename, doc_data) pairs, newest upload first
+    """
+    items = []
+    for filename, data in documents.items():
+        if uploaders and data.get('uploaded_by') not in uploaders:
+            continue
+        if file_types and data.get('file_type') not in file_types:
+            continue
+        if date_range and len(date_range) == 2 and data.get('uploaded_at'):
+            uploaded_on = datetime.fromisoformat(data['uploaded_at']).date()
+            if not (date_range[0] <= uploaded_on <= date_range[1]):
+                continue
+        items.append((filename, data))
+    items.sort(key=lambda item: item[1].get('uploaded_at', ''), reverse=True)
+    return items
+
+def paginate(items, page, page_size=DOCS_PAGE_SIZE):
+    """Return the items for a 1-based page number"""
+    start = (page - 1) * page_size
+    return items[start:start + page_size]
+
+def document_filters(key_prefix):
+    """Render uploader / type / date filters and return the matching documents"""
+    documents = st.session_state.documents
+    uploaders = sorted({d.get('uploaded_by', '') for d in documents.values()})
+    file_types = sorted({d.get('file_type', '') for d in documents.values() if d.get('file_type')})
+
+    col1, col2, col3 = st.columns(3)
+    selected_uploaders = col1.multiselect("Uploaded by", uploaders, key=f"{key_prefix}_uploaders")
+    selected_types = col2.multiselect("Type", file_types, key=f"{key_prefix}_types")
+    date_range = col3.date_input("Uploaded between", value=(), key=f"{key_prefix}_dates")
+
+    return filter_documents(documents, selected_uploaders, selected_types, date_range)
+
+def page_selector(total, key_prefix):
+    """Render a page picker and return the selected 1-based page"""
+    pages = max(1, (total + DOCS_PAGE_SIZE - 1) // DOCS_PAGE_SIZE)
+    if pages == 1:
+        return 1
+    page = st.number_input(f"Page (1-{pages})", min_value=1, max_value=pages, value=1, step=1,
+                           key=f"{key_prefix}_page")
+    return int(page)
+
+@st.fragment
+def render_document_list():
+    """Paginated, filterable listing of uploaded documents"""
+    if not st.session_state.documents:
+        st.info("No documents uploaded yet.")
+        return
+
+    items = document_filters("doclist")
+    st.caption(f"{len(items)} of {len(st.session_state.documents)} documents")
+    page = page_selector(len(items), "doclist")
+    for filename, data in paginate(items, page):
+        st.text(f"📄 {filename} (Uploaded by {data['uploaded_by']})")
+
+@st.fragment
+def render_summaries():
+    """Paginated summaries; a summary body is only sent once its toggle is opened"""
+    if not st.session_state.documents:
+        st.info("No summaries available. Upload and process documents first.")
+        return
+
+    items = document_filters("summaries")
+    st.caption(f"{len(items)} of {len(st.session_state.documents)} documents")
+    page = page_selector(len(items), "summaries")
+    for filename, data in paginate(items, page):
+        # Toggle instead of st.expander: expander content is serialized even when collapsed
+        if st.toggle(f"Summary: {filename}", key=f"summary_open_{filename}"):
+            with st.container(border=True):
+                st.markdown(refresh_summary(filename, data))
 
 # --- Authentication ---
 def login_page():
@@ -299,6 +608,57 @@ def login_page():
         else:
             st.error("Please enter email and password")
 
+# --- Chatbot ---
+@st.fragment
+def render_chatbot(api_key):
+    """Chatbot tab; a chat submission reruns only this fragment, not the document tabs"""
+    st.header("KT Assistant")
+    
+    # Display chat history
+    for msg in st.session_state.chat_history:
+        with st.chat_message(msg["role"]):
+            st.markdown(msg["content"])
+            render_citations(msg.get("citations"))
+    
+    # Chat input
+    if prompt := st.chat_input("Ask a question about the project..."):
+        if not api_key:
+            st.warning("⚠️ Chat feature requires API key. Please configure GEMINI_API_KEY in .env file.")
+        else:
+            # Add user message
+            st.session_state.chat_history.append({"role": "user", "content": prompt})
+            with st.chat_message("user"):
+                st.markdown(prompt)
+            
+            # Route the question to the most relevant documents, using any summaries
+            # the warm-up job has produced since they were uploaded
+            for filename, data in st.session_state.documents.items():
+                refresh_summary(filename, data)
+            routed = route_documents(prompt, st.session_state.documents)
+            routed_docs = {name: st.session_state.documents[name] for name, _ in routed}
+
+            # Generate response
+            with st.chat_message("assistant"):
+                if routed:
+                    with st.expander("Documents used"):
+                        for name, score in routed:
+                            st.text(f"📄 {name} (relevance {score:.2f})")
+                with st.spinner("Thinking..."):
+                    response, citations, cache_hit = answer_question(
+                        prompt, 
+                        routed_docs, 
+                        st.session_state.chat_history[:-1], # Pass history excluding current prompt to avoid duplication in prompt logic if needed
+                        api_key,
+                        st.session_state.username
+                    )
+                    st.markdown(response)
+                if cache_hit:
+                    st.caption("⚡ Answered from cache")
+                render_citations(citations)
+            
+            # Add assistant message
+            st.session_state.chat_history.append({"role": "assistant", "content": response, "citations": citations})
+
 # --- Main App ---
 def main_app():
     st.sidebar.title(f"Welcome, {st.session_state.get('username', 'User')}")
@@ -322,14 +682,20 @@ def main_app():
                     for i, uploaded_file in enumerate(uploaded_files):
                         if uploaded_file.name not in st.session_state.documents:
                             with st.spinner(f"Processing {uploaded_file.name}..."):
-                                file_path, text = process_file(uploaded_file)
-                                summary = "Summary not available - API key not configured."
+                                file_path, text, chunks = process_file(uploaded_file)
+                                summary = cached_summary(uploaded_file.name, text)
+                                if summary is None:
+                                    # Queued for the summary warm-up job; a stale summary is shown until then
+                                    summary = queue_summary(uploaded_file.name, text) or NO_API_KEY_SUMMARY
                                 
                                 st.session_state.documents[uploaded_file.name] = {
                                     "text": text,
                                     "summary": summary,
                                     "uploaded_by": st.session_state.username,
-                                    "file_path": file_path
+                                    "uploaded_at": datetime.now().isoformat(),
+                                    "file_type": os.path.splitext(uploaded_file.name)[1].lower(),
+                                    "file_path": file_path,
+                                    "chunks": chunks
                                 }
                                 # Store file upload in Supabase
                                 store_file_upload(st.session_state.username, uploaded_file.name, file_path)
@@ -337,73 +703,59 @@ def main_app():
                     st.success("Documents processed successfully! (Note: Summaries not generated - API key needed)")
                 else:
                     progress_bar = st.progress(0)
+                    pending = []  # (filename, text) still needing a summary
                     for i, uploaded_file in enumerate(uploaded_files):
                         if uploaded_file.name not in st.session_state.documents:
                             with st.spinner(f"Processing {uploaded_file.name}..."):
-                                file_path, text = process_file(uploaded_file)
-                                summary = generate_summary(text, api_key)
+                                file_path, text, chunks = process_file(uploaded_file)
+                                summary = cached_summary(uploaded_file.name, text)
+                                if summary is None:
+                                    pending.append((uploaded_file.name, text))
                                 
                                 st.session_state.documents[uploaded_file.name] = {
                                     "text": text,
                                     "summary": summary,
+                                    "summary_current": summary is not None,
                                     "uploaded_by": st.session_state.username,
-                                    "file_path": file_path
+                                    "uploaded_at": datetime.now().isoformat(),
+                                    "file_type": os.path.splitext(uploaded_file.name)[1].lower(),
+                                    "file_path": file_path,
+                                    "chunks": chunks
                                 }
                                 # Store file upload in Supabase
                                 store_file_upload(st.session_state.username, uploaded_file.name, file_path)
                         progress_bar.progress((i + 1) / len(uploaded_files))
+
+                    if pending:
+                        with st.spinner(f"Summarizing {len(pending)} document(s)..."):
+                            summaries = async_io.run(
+                                generate_summaries_async([text for _, text in pending], api_key)
+                            )
+                        for (filename, text), summary in zip(pending, summaries):
+                            doc_data = st.session_state.documents[filename]
+                            if isinstance(summary, Exception):
+                                summary = f"{SUMMARY_ERROR_PREFIX} {summary}"
+                            if summary.startswith(SUMMARY_ERROR_PREFIX):
+                                # Keep any previous summary; the warm-up job retries the rest
+                                doc_data["summary"] = queue_summary(filename, text, error=summary) or FAILED_SUMMARY
+                            else:
+                                save_summary(filename, text, summary)
+                                doc_data["summary"] = summary
+                                doc_data["summary_current"] = True
                     st.success("Documents processed successfully!")
 
         st.divider()
         st.subheader("Uploaded Documents")
-        if st.session_state.documents:
-            for filename, data in st.session_state.documents.items():
-                st.text(f"📄 {filename} (Uploaded by {data['uploaded_by']})")
-        else:
-            st.info("No documents uploaded yet.")
+        render_document_list()
 
     # --- Tab 2: Summaries ---
     with tab2:
         st.header("Document Summaries")
-        if st.session_state.documents:
-            for filename, data in st.session_state.documents.items():
-                with st.expander(f"Summary: {filename}"):
-                    st.markdown(data['summary'])
-        else:
-            st.info("No summaries available. Upload and process documents first.")
+        render_summaries()
 
     # --- Tab 3: Chatbot ---
     with tab3:
-        st.header("KT Assistant")
-        
-        # Display chat history
-        for msg in st.session_state.chat_history:
-            with st.chat_message(msg["role"]):
-                st.markdown(msg["content"])
-        
-        # Chat input
-        if prompt := st.chat_input("Ask a question about the project..."):
-            if not api_key:
-                st.warning("⚠️ Chat feature requires API key. Please configure GEMINI_API_KEY in .env file.")
-            else:
-                # Add user message
-                st.session_state.chat_history.append({"role": "user", "content": prompt})
-                with st.chat_message("user"):
-                    st.markdown(prompt)
-                
-                # Generate response
-                with st.chat_message("assistant"):
-                    with st.spinner("Thinking..."):
-                        response = chat_with_docs(
-                            prompt, 
-                            st.session_state.documents, 
-                            st.session_state.chat_history[:-1], # Pass history excluding current prompt to avoid duplication in prompt logic if needed
-                            api_key
-                        )
-                        st.markdown(response)
-                
-                # Add assistant message
-                st.session_state.chat_history.append({"role": "assistant", "content": response})
+        render_chatbot(api_key)
 
 if __name__ == "__main__":
     if not st.session_state.authenticated:
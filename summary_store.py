@@ -0,0 +1,298 @@
+"""
+Summary generation and the on-disk summary store.
+
+Every stored document gets a small JSON record under uploaded_docs/.summaries
+holding its summary, where its text lives and the prompt/model version.
+The Streamlit app reads these records so the Summaries tab never waits on Gemini,
+and the warm-up job below regenerates records that are missing, failed or stale:
+
+    python summary_store.py                  # one pass, 10 requests per minute
+    python summary_store.py --rpm 30 --limit 100
+    python summary_store.py --interval 3600  # re-scan every hour
+"""
+import argparse
+import hashlib
+import json
+import os
+import tempfile
+import time
+from datetime import datetime
+
+import google.generativeai as genai  # pyright: ignore[reportMissingImports]
+from dotenv import load_dotenv
+
+import async_io
+import document_reader
+import text_store
+
+SUMMARY_MODEL = 'gemini-2.5-flash'
+SUMMARY_INPUT_CHARS = 10000
+SUMMARY_PROMPT = """
+        Please provide a concise summary of the following project document in 5-10 lines maximum.
+        Focus on:
+        1. Purpose of the document
+        2. Key processes
+        3. Important contacts / ownership
+        4. Key decisions
+
+        Keep the summary brief and to the point. Each point should be 1-2 lines.
+
+        Document Content:
+        {text}
+        """
+# Changes whenever the prompt or model changes, marking every existing summary as stale
+SUMMARY_VERSION = hashlib.sha256(f"{SUMMARY_MODEL}\n{SUMMARY_PROMPT}".encode('utf-8')).hexdigest()[:12]
+SUMMARY_ERROR_PREFIX = "Error generating summary:"
+
+UPLOAD_DIR = "uploaded_docs"
+SUMMARY_DIR = os.path.join(UPLOAD_DIR, ".summaries")
+
+
+async def generate_summary_async(text, api_key):
+    """Summarize a document with Gemini; failures are returned as SUMMARY_ERROR_PREFIX text"""
+    if not text:
+        return "No text to summarize."
+
+    try:
+        genai.configure(api_key=api_key)
+        model = genai.GenerativeModel(SUMMARY_MODEL)
+        prompt = SUMMARY_PROMPT.format(text=text[:SUMMARY_INPUT_CHARS])
+        response = await model.generate_content_async(prompt)
+        return response.text
+    except Exception as e:
+        return f"{SUMMARY_ERROR_PREFIX} {e}"
+
+def generate_summary(text, api_key):
+    """
+    Blocking wrapper around generate_summary_async. It runs on the shared I/O loop
+    rather than asyncio.run, since the async Gemini client binds to the first loop it uses.
+    """
+    return async_io.run(generate_summary_async(text, api_key))
+
+def text_hash(text):
+    """Hash of the part of the text the summary prompt actually sees"""
+    return hashlib.sha256(text[:SUMMARY_INPUT_CHARS].encode('utf-8')).hexdigest()
+
+def record_path(filename):
+    """Path of the summary record for a document"""
+    key = hashlib.sha256(filename.encode('utf-8')).hexdigest()[:32]
+    return os.path.join(SUMMARY_DIR, f"{key}.json")
+
+def load_record(filename):
+    """Load a document's summary record, or None if it has none"""
+    try:
+        with open(record_path(filename), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+def save_record(record):
+    """Atomically write a summary record so the app never reads a half-written file"""
+    os.makedirs(SUMMARY_DIR, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=SUMMARY_DIR, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(record, f)
+    os.replace(tmp_path, record_path(record['filename']))
+
+def iter_records():
+    """Yield every stored summary record"""
+    if not os.path.isdir(SUMMARY_DIR):
+        return
+    for name in sorted(os.listdir(SUMMARY_DIR)):
+        if name.endswith(".json"):
+            try:
+                with open(os.path.join(SUMMARY_DIR, name), "r", encoding="utf-8") as f:
+                    yield json.load(f)
+            except (OSError, json.JSONDecodeError):
+                continue
+
+def save_summary(filename, text, summary):
+    """
+    Store a summary for a document.
+
+    Args:
+        filename (str): Document name, used as the record key
+        text (str | TextHandle): Extracted document text
+        summary (str): Generated summary, or None if it could not be generated yet
+
+    Returns:
+        dict: The stored record
+    """
+    record = {
+        "filename": filename,
+        "text_hash": text_hash(text),
+        "summary": summary,
+        "version": SUMMARY_VERSION,
+        "generated_at": datetime.now().isoformat() if summary else None,
+    }
+    if isinstance(text, text_store.TextHandle):
+        record["text_path"] = text.path
+    else:
+        record["source"] = text[:SUMMARY_INPUT_CHARS]
+    save_record(record)
+    return record
+
+def record_source(record):
+    """Text the summary is generated from, read back from the text store when possible"""
+    if record.get('text_path'):
+        return text_store.open_text(record['text_path'])[:SUMMARY_INPUT_CHARS]
+    return record.get('source', "")
+
+def refresh_reason(record):
+    """
+    Why a record needs regenerating.
+
+    Returns:
+        str: "missing", "failed" or "stale", or None if the summary is current
+    """
+    if not record.get('summary'):
+        return "missing"
+    if record['summary'].startswith(SUMMARY_ERROR_PREFIX) or record.get('last_error'):
+        return "failed"
+    if record.get('version') != SUMMARY_VERSION:
+        return "stale"
+    return None
+
+def usable_summary(record):
+    """The record's summary if it can be shown, even when stale or due for a retry"""
+    summary = record.get('summary')
+    if summary and not summary.startswith(SUMMARY_ERROR_PREFIX):
+        return summary
+    return None
+
+def cached_summary(filename, text):
+    """Current summary for this exact text, or None if it must be (re)generated"""
+    record = load_record(filename)
+    if record and record.get('text_hash') == text_hash(text) and refresh_reason(record) is None:
+        return record['summary']
+    return None
+
+def queue_summary(filename, text, error=None):
+    """
+    Record that a document still needs a summary, for the warm-up job to fill in.
+
+    A usable previous summary of the same text is kept until it is regenerated,
+    and the error of a failed generation is stored beside it, never in its place.
+
+    Args:
+        filename (str): Document name
+        text (str | TextHandle): Extracted document text
+        error (str): Why generation failed, or None if it was not attempted
+
+    Returns:
+        str: The previous summary if one was kept, otherwise None
+    """
+    record = load_record(filename)
+    if record and record.get('text_hash') == text_hash(text) and usable_summary(record):
+        if error:
+            record['last_error'] = error
+            save_record(record)
+        return record['summary']
+    record = save_summary(filename, text, None)
+    if error:
+        record['last_error'] = error
+        save_record(record)
+    return None
+
+def register_untracked_documents(log=print):
+    """
+    Create summary records for files in the upload directory that have none yet,
+    such as documents uploaded before the summary store existed.
+
+    Returns:
+        int: Number of documents registered
+    """
+    registered = 0
+    for name in sorted(os.listdir(UPLOAD_DIR)) if os.path.isdir(UPLOAD_DIR) else []:
+        file_path = os.path.join(UPLOAD_DIR, name)
+        if (name.startswith(".") or not os.path.isfile(file_path)
+                or os.path.splitext(name)[1].lower() not in document_reader.SUPPORTED_EXTENSIONS
+                or load_record(name) is not None):
+            continue
+        try:
+            text, _ = document_reader.extract_text(file_path)
+        except Exception as e:
+            log(f"❌ {name}: could not extract text: {e}")
+            continue
+        save_summary(name, text_store.write_text(text), None)
+        registered += 1
+        log(f"➕ {name} registered")
+    return registered
+
+def warm_up(api_key, requests_per_minute=10, limit=None, log=print):
+    """
+    Regenerate missing, failed and stale summaries, rate limited.
+
+    Stored documents without a record are registered first, so they are
+    summarized too.
+
+    Args:
+        api_key (str): Gemini API key
+        requests_per_minute (float): Upper bound on Gemini calls
+        limit (int): Maximum number of summaries to regenerate in this pass
+        log (callable): Progress output
+
+    Returns:
+        dict: Count of regenerated summaries per reason, plus "errors"
+    """
+    counts = {"missing": 0, "failed": 0, "stale": 0, "errors": 0}
+    interval = 60.0 / requests_per_minute
+    next_call = 0.0
+    done = 0
+
+    register_untracked_documents(log)
+    for record in iter_records():
+        reason = refresh_reason(record)
+        if reason is None:
+            continue
+        if limit is not None and done >= limit:
+            break
+
+        try:
+            source = record_source(record)
+        except Exception as e:
+            # e.g. a missing or corrupt text store file; skip it rather than end the pass
+            counts["errors"] += 1
+            log(f"❌ {record['filename']} ({reason}): could not read text: {e}")
+            continue
+
+        time.sleep(max(0.0, next_call - time.monotonic()))
+        next_call = time.monotonic() + interval
+
+        summary = generate_summary(source, api_key)
+        done += 1
+        if summary.startswith(SUMMARY_ERROR_PREFIX):
+            # Keep the previous summary (if any) rather than overwrite it with an error
+            counts["errors"] += 1
+            log(f"❌ {record['filename']} ({reason}): {summary}")
+            continue
+
+        record.update(summary=summary, version=SUMMARY_VERSION, generated_at=datetime.now().isoformat())
+        record.pop('last_error', None)
+        save_record(record)
+        counts[reason] += 1
+        log(f"✅ {record['filename']} ({reason})")
+
+    return counts
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Regenerate missing, failed and stale document summaries")
+    parser.add_argument("--rpm", type=float, default=10, help="Maximum Gemini requests per minute")
+    parser.add_argument("--limit", type=int, default=None, help="Maximum summaries to regenerate per pass")
+    parser.add_argument("--interval", type=float, default=None,
+                        help="Seconds between passes; runs a single pass if omitted")
+    args = parser.parse_args()
+
+    api_key = os.getenv('GEMINI_API_KEY', '').strip()
+    if not api_key:
+        raise SystemExit("GEMINI_API_KEY is not configured.")
+
+    while True:
+        print(f"Summary warm-up (prompt version {SUMMARY_VERSION})")
+        counts = warm_up(api_key, args.rpm, args.limit)
+        print(f"Done: {counts}\n")
+        if args.interval is None:
+            break
+        time.sleep(args.interval)
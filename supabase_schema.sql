@@ -21,18 +21,38 @@ CREATE TABLE IF NOT EXISTS file_uploads (
     created_at TIMESTAMPTZ DEFAULT NOW()
 );
 
+-- Table: chat_queries
+-- Stores one row per chatbot question for usage analytics
+CREATE TABLE IF NOT EXISTS chat_queries (
+    id UUID DEFAULT gen_random_uuid() PRIMARY KEY,
+    email TEXT NOT NULL,
+    question TEXT NOT NULL,
+    normalized_question TEXT NOT NULL,
+    documents TEXT[] DEFAULT '{}',
+    latency_ms INTEGER,
+    cache_hit BOOLEAN DEFAULT FALSE,
+    prompt_tokens INTEGER,
+    response_tokens INTEGER,
+    query_time TIMESTAMPTZ DEFAULT NOW(),
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
 -- Create indexes for better query performance
 CREATE INDEX IF NOT EXISTS idx_user_logins_email ON user_logins(email);
 CREATE INDEX IF NOT EXISTS idx_user_logins_time ON user_logins(login_time);
 CREATE INDEX IF NOT EXISTS idx_file_uploads_email ON file_uploads(email);
 CREATE INDEX IF NOT EXISTS idx_file_uploads_time ON file_uploads(upload_time);
+CREATE INDEX IF NOT EXISTS idx_chat_queries_time ON chat_queries(query_time);
+CREATE INDEX IF NOT EXISTS idx_chat_queries_question ON chat_queries(normalized_question);
 
 -- Enable Row Level Security (RLS) - Optional
 -- ALTER TABLE user_logins ENABLE ROW LEVEL SECURITY;
 -- ALTER TABLE file_uploads ENABLE ROW LEVEL SECURITY;
+-- ALTER TABLE chat_queries ENABLE ROW LEVEL SECURITY;
 
 -- Create policies if you want to restrict access
 -- For now, we'll allow all operations (you can customize later)
 -- CREATE POLICY "Allow all operations on user_logins" ON user_logins FOR ALL USING (true);
 -- CREATE POLICY "Allow all operations on file_uploads" ON file_uploads FOR ALL USING (true);
+-- CREATE POLICY "Allow all operations on chat_queries" ON chat_queries FOR ALL USING (true);
 
@@ -0,0 +1,138 @@
+"""
+Compressed on-disk store for extracted document text.
+
+Each document is written once to uploaded_docs/.text/<content hash>.ktx as a
+series of independently zlib-compressed blocks of BLOCK_CHARS characters,
+followed by a table of block byte offsets and a fixed-size footer:
+
+    [block 0][block 1]...[block n-1][offsets: n+1 x uint64][footer]
+
+The app keeps a TextHandle per document instead of the full string. Slicing a
+handle (handle[:10000]) memory-maps the file and decompresses only the blocks
+that overlap the slice, so prompts touch just the text they need.
+"""
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import zlib
+from array import array
+from collections import OrderedDict
+from functools import lru_cache
+
+TEXT_DIR = os.path.join("uploaded_docs", ".text")
+BLOCK_CHARS = 16384
+COMPRESSION_LEVEL = 6
+
+MAGIC = b"KTX1"
+# magic, block_chars, block count, total chars, offset table position
+FOOTER = struct.Struct("<4sIIQQ")
+
+# Open memory maps, most recently used last. Each map holds a file descriptor, so only
+# MAX_OPEN_MAPS stay open; the lock also keeps a map from being closed mid-read.
+MAX_OPEN_MAPS = 64
+_maps = OrderedDict()
+_maps_lock = threading.Lock()
+
+
+def _read_bytes(path, start, end=None):
+    """Copy a byte range out of a store file through a cached read-only memory map"""
+    with _maps_lock:
+        data = _maps.get(path)
+        if data is None:
+            with open(path, "rb") as f:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            _maps[path] = data
+            if len(_maps) > MAX_OPEN_MAPS:
+                _, evicted = _maps.popitem(last=False)
+                evicted.close()
+        else:
+            _maps.move_to_end(path)
+        return data[start:end]
+
+@lru_cache(maxsize=256)
+def _read_block(path, start, end):
+    """Decompress one block; recently used blocks stay cached"""
+    return zlib.decompress(_read_bytes(path, start, end)).decode('utf-8')
+
+
+class TextHandle:
+    """
+    Lightweight, str-like reference to a document in the text store.
+
+    Supports len(), truthiness and slicing with non-negative steps of 1,
+    which is everything the app does with document text.
+    """
+
+    def __init__(self, path, block_chars, length, offsets):
+        self.path = path
+        self.block_chars = block_chars
+        self.length = length
+        self.offsets = offsets
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            raise TypeError("TextHandle only supports slicing")
+        start, stop, step = key.indices(self.length)
+        if step != 1:
+            raise ValueError("TextHandle slices must have a step of 1")
+        return self.read(start, stop)
+
+    def read(self, start, stop):
+        """Return the text between two character offsets"""
+        if stop <= start:
+            return ""
+        first = start // self.block_chars
+        last = (stop - 1) // self.block_chars
+        text = "".join(
+            _read_block(self.path, self.offsets[block], self.offsets[block + 1])
+            for block in range(first, last + 1)
+        )
+        base = first * self.block_chars
+        return text[start - base:stop - base]
+
+    def __str__(self):
+        return self.read(0, self.length)
+
+    def __repr__(self):
+        return f"TextHandle({self.path!r}, {self.length} chars)"
+
+
+def write_text(text):
+    """
+    Compress text into the store, reusing an existing file for identical content.
+
+    Returns:
+        TextHandle: Handle to the stored text
+    """
+    os.makedirs(TEXT_DIR, exist_ok=True)
+    digest = hashlib.sha256(text.encode('utf-8')).hexdigest()[:32]
+    path = os.path.join(TEXT_DIR, f"{digest}.ktx")
+    if os.path.exists(path):
+        return open_text(path)
+
+    offsets = array('Q', [0])
+    fd, tmp_path = tempfile.mkstemp(dir=TEXT_DIR, suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        for start in range(0, len(text), BLOCK_CHARS):
+            frame = zlib.compress(text[start:start + BLOCK_CHARS].encode('utf-8'), COMPRESSION_LEVEL)
+            f.write(frame)
+            offsets.append(offsets[-1] + len(frame))
+        f.write(offsets.tobytes())
+        f.write(FOOTER.pack(MAGIC, BLOCK_CHARS, len(offsets) - 1, len(text), offsets[-1]))
+    os.replace(tmp_path, path)
+    return TextHandle(path, BLOCK_CHARS, len(text), offsets)
+
+def open_text(path):
+    """Open a handle to an existing store file by reading its footer and offset table"""
+    magic, block_chars, blocks, length, table_pos = FOOTER.unpack(_read_bytes(path, -FOOTER.size))
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a text store file")
+    offsets = array('Q')
+    offsets.frombytes(_read_bytes(path, table_pos, table_pos + (blocks + 1) * offsets.itemsize))
+    return TextHandle(path, block_chars, length, offsets)